@@ -6,28 +6,100 @@ with transparent calculations.
 """
 
 import os
-from typing import Any, Tuple
+from collections import deque
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Tuple
 
 import streamlit as st
-from dotenv import load_dotenv
-from hydra import compose, initialize
-from hydra.core.global_hydra import GlobalHydra
-from omegaconf import DictConfig
 
-from diffbot_api import analyze_with_diffbot, validate_api_key
+if TYPE_CHECKING:
+	from omegaconf import DictConfig
+
+from diffbot_api import analyze_with_diffbot, get_diffbot_client, validate_api_key
 from utils import (
+	ab_stats,
+	build_dataframe_summary,
 	calculate_conversion_rate,
 	create_ab_test_visualization,
+	create_sample_data,
+	export_results_to_csv,
+	summarize_uploaded_csv,
 )
 
 
+@st.cache_resource(show_spinner=False)
+def load_environment() -> bool:
+	"""Load environment variables from .env once per process."""
+	from dotenv import load_dotenv
+
+	load_dotenv()
+	return True
+
+
+@st.cache_resource(show_spinner=False)
+def load_config() -> "DictConfig":
+	"""Compose the Hydra configuration once per process.
+
+	Hydra is imported here rather than at module top so its import cost is
+	only paid inside this cached loader.
+	"""
+	from hydra import compose, initialize
+	from hydra.core.global_hydra import GlobalHydra
+
+	if GlobalHydra().is_initialized():
+		GlobalHydra.instance().clear()
+	initialize(config_path=".", version_base=None)
+	return compose(config_name="config")
+
+
+@st.cache_resource(show_spinner=False)
+def get_prompt_templates() -> dict:
+	"""
+	Materialize the prompt templates as plain strings once per process.
+
+	Reading cfg.prompts.* on every click re-runs OmegaConf interpolation;
+	caching the str() forms keeps .format() on the hot path cheap. Each
+	analysis type has a static *_system template (sent as the system
+	message, so provider prompt caches hit on the shared prefix) and a
+	dynamic user-message template.
+	"""
+	cfg = load_config()
+	return {name: str(template) for name, template in cfg.prompts.items()}
+
+
 def initialize_session_state(key: str, default_value: Any) -> None:
 	"""Initialize session state variable if not exists."""
 	if key not in st.session_state:
 		st.session_state[key] = default_value
 
 
-def setup_page_config(cfg: DictConfig) -> None:
+def store_analysis_result(analysis_type: str, query: str, result: str) -> None:
+	"""
+	Append an analysis record to the session history.
+
+	The history is a deque with a bounded maxlen, so appends are O(1) and
+	memory stays capped however long the session runs.
+	"""
+	initialize_session_state("analysis_history", deque(maxlen=100))
+	timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+	# Precompute the strings the History tab renders so reruns don't redo
+	# an O(result length) replace+slice per row
+	summary = result.replace("\n", " ")
+	if len(summary) > 500:
+		summary = summary[:500] + "…"
+	st.session_state.analysis_history.append(
+		{
+			"timestamp": timestamp,
+			"type": analysis_type,
+			"query": query,
+			"result": result,
+			"summary": summary,
+			"label": f"{timestamp} — {analysis_type}: {query[:80]}",
+		}
+	)
+
+
+def setup_page_config(cfg: "DictConfig") -> None:
 	"""Configure Streamlit page settings."""
 	st.set_page_config(
 		page_title=cfg.page.title,
@@ -37,7 +109,7 @@ def setup_page_config(cfg: DictConfig) -> None:
 	)
 
 
-def render_sidebar(cfg: DictConfig) -> Tuple[str, str]:
+def render_sidebar(cfg: "DictConfig") -> Tuple[str, str]:
 	"""
 	Render sidebar with API configuration and model selection.
 
@@ -46,43 +118,41 @@ def render_sidebar(cfg: DictConfig) -> Tuple[str, str]:
 	"""
 	st.sidebar.header("⚙️ Configuration")
 
-	# API Key Configuration
+	# Resolve config leaves once; every cfg.x.y access walks the OmegaConf
+	# node tree, so bind the values used below to locals up front
 	try:
-		default_token_env = cfg.api.token_env_var
-		signup_url = cfg.urls.diffbot_signup
+		token_env_var = str(cfg.api.token_env_var)
+		signup_url = str(cfg.urls.diffbot_signup)
+		available_models = [str(model) for model in cfg.api.available_models]
 	except Exception:
 		# Fallback if config access fails
-		default_token_env = "DIFFBOT_API_TOKEN"
+		token_env_var = "DIFFBOT_API_TOKEN"
 		signup_url = "https://app.diffbot.com/get-started"
+		available_models = ["diffbot-small-xl", "diffbot-small"]
 
 	api_key = st.sidebar.text_input(
 		"🔑 Diffbot API Token",
 		type="password",
 		help=f"Enter your Diffbot API token. Get one at {signup_url}",
-		value=st.session_state.get("api_key", "") or os.getenv(default_token_env, ""),
+		value=st.session_state.get("api_key", "") or os.getenv(token_env_var, ""),
 	)
 
-	# Store API key in session state
+	# Store API key in session state only when it actually changed; an
+	# unconditional write re-dirties session state on every rerun
 	if api_key:
-		st.session_state.api_key = api_key
+		if st.session_state.get("api_key") != api_key:
+			if st.session_state.get("api_key"):
+				# Drop clients built for the previous key so they don't linger
+				get_diffbot_client.clear()
+			st.session_state.api_key = api_key
 		if validate_api_key(api_key):
 			st.sidebar.success("✅ API key provided")
 		else:
 			st.sidebar.error("❌ API key required")
 	else:
-		try:
-			env_var_name = cfg.api.token_env_var
-		except Exception:
-			env_var_name = "DIFFBOT_API_TOKEN"
-		st.sidebar.info(f"💡 Set {env_var_name} environment variable to auto-fill")
+		st.sidebar.info(f"💡 Set {token_env_var} environment variable to auto-fill")
 
 	# Model Selection
-	try:
-		available_models = list(cfg.api.available_models)
-	except Exception:
-		# Fallback models if config access fails
-		available_models = ["diffbot-small-xl", "diffbot-small"]
-
 	model_choice = st.sidebar.selectbox(
 		"🤖 Model Selection",
 		available_models,
@@ -92,13 +162,21 @@ def render_sidebar(cfg: DictConfig) -> Tuple[str, str]:
 	return api_key, model_choice
 
 
-def render_ab_test_tab(cfg: DictConfig, api_key: str, model_choice: str) -> None:
-	"""Render A/B test analyzer tab."""
+@st.fragment
+def render_ab_test_tab(cfg: "DictConfig", api_key: str, model_choice: str) -> None:
+	"""Render A/B test analyzer tab as a fragment scoped to its own reruns."""
 	st.header("📈 A/B Test Analysis")
 	st.markdown(
 		"Compare control and treatment groups with statistical significance testing."
 	)
 
+	# Resolve widget defaults from config once per rerun instead of walking
+	# OmegaConf inside each number_input call
+	control_users_default = int(cfg.app_defaults.control_users)
+	control_conversions_default = int(cfg.app_defaults.control_conversions)
+	treatment_users_default = int(cfg.app_defaults.treatment_users)
+	treatment_conversions_default = int(cfg.app_defaults.treatment_conversions)
+
 	col1, col2 = st.columns(2)
 
 	with col1:
@@ -106,14 +184,14 @@ def render_ab_test_tab(cfg: DictConfig, api_key: str, model_choice: str) -> None
 		control_users = st.number_input(
 			"Number of Users",
 			min_value=1,
-			value=cfg.app_defaults.control_users,
+			value=control_users_default,
 			help="Total users in control group",
 		)
 		control_conversions = st.number_input(
 			"Conversions",
 			min_value=0,
 			max_value=control_users,
-			value=min(cfg.app_defaults.control_conversions, control_users),
+			value=min(control_conversions_default, control_users),
 			help="Number of conversions in control group",
 		)
 		control_rate = calculate_conversion_rate(control_conversions, control_users)
@@ -124,7 +202,7 @@ def render_ab_test_tab(cfg: DictConfig, api_key: str, model_choice: str) -> None
 		treatment_users = st.number_input(
 			"Number of Users",
 			min_value=1,
-			value=cfg.app_defaults.treatment_users,
+			value=treatment_users_default,
 			help="Total users in treatment group",
 			key="treatment_users",
 		)
@@ -132,7 +210,7 @@ def render_ab_test_tab(cfg: DictConfig, api_key: str, model_choice: str) -> None
 			"Conversions",
 			min_value=0,
 			max_value=treatment_users,
-			value=min(cfg.app_defaults.treatment_conversions, treatment_users),
+			value=min(treatment_conversions_default, treatment_users),
 			help="Number of conversions in treatment group",
 			key="treatment_conversions",
 		)
@@ -153,34 +231,80 @@ def render_ab_test_tab(cfg: DictConfig, api_key: str, model_choice: str) -> None
 		)
 		st.plotly_chart(fig, use_container_width=True)
 
-		# Prepare analysis prompt
-		prompt = cfg.prompts.ab_test.format(
+		# Exact statistics computed locally — no LLM round-trip needed
+		stats = ab_stats(
+			control_users, control_conversions, treatment_users, treatment_conversions
+		)
+		stat_col1, stat_col2, stat_col3 = st.columns(3)
+		stat_col1.metric("P-value", f"{stats['p_value']:.4f}")
+		stat_col2.metric("Z-score", f"{stats['z_score']:.2f}")
+		stat_col3.metric(
+			"95% CI (diff, pp)", f"[{stats['ci_low']:.2f}, {stats['ci_high']:.2f}]"
+		)
+
+		# Prepare analysis prompt; the LLM interprets the computed stats
+		prompts = get_prompt_templates()
+		prompt = prompts["ab_test"].format(
 			control_users=control_users,
 			control_conversions=control_conversions,
-			control_rate=control_rate,
+			control_rate=stats["control_rate"],
 			treatment_users=treatment_users,
 			treatment_conversions=treatment_conversions,
-			treatment_rate=treatment_rate,
+			treatment_rate=stats["treatment_rate"],
+			diff=stats["diff"],
+			z_score=stats["z_score"],
+			p_value=stats["p_value"],
+			ci_low=stats["ci_low"],
+			ci_high=stats["ci_high"],
 		)
 
-		with st.spinner("🔍 Analyzing A/B test..."):
-			try:
-				result = analyze_with_diffbot(
-					prompt,
-					api_key,
-					model_choice,
-					cfg.api.base_url,
-					cfg.api.token_env_var
-				)
-				st.markdown("### 📊 Analysis Results")
-				st.markdown(result)
-
-			except Exception as e:
-				st.error(f"Analysis failed: {str(e)}")
-
+		st.markdown("### 📊 Analysis Results")
+		try:
+			# Response streams into the page as tokens arrive
+			result = analyze_with_diffbot(
+				prompt,
+				api_key,
+				model_choice,
+				cfg.api.base_url,
+				cfg.api.token_env_var,
+				system=prompts["ab_test_system"],
+			)
+
+		except Exception as e:
+			st.error(f"Analysis failed: {str(e)}")
+			return
 
-def render_market_research_tab(cfg: DictConfig, api_key: str, model_choice: str) -> None:
-	"""Render market research tab."""
+		if result:
+			store_analysis_result(
+				"A/B Test",
+				f"{control_users}/{control_conversions} vs "
+				f"{treatment_users}/{treatment_conversions}",
+				result,
+			)
+			st.download_button(
+				"📄 Download CSV Report",
+				data=export_results_to_csv(
+					[
+						{
+							"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+							"type": "A/B Test",
+							"control_users": control_users,
+							"control_conversions": control_conversions,
+							"treatment_users": treatment_users,
+							"treatment_conversions": treatment_conversions,
+							"p_value": stats["p_value"],
+							"result": result,
+						}
+					]
+				),
+				file_name="ab_test_analysis.csv",
+				mime="text/csv",
+			)
+
+
+@st.fragment
+def render_market_research_tab(cfg: "DictConfig", api_key: str, model_choice: str) -> None:
+	"""Render market research tab as a fragment scoped to its own reruns."""
 	st.header("🔍 Real-time Market Research")
 	st.markdown(
 		"Get current market data, trends, and benchmarks with proper source citations."
@@ -190,33 +314,44 @@ def render_market_research_tab(cfg: DictConfig, api_key: str, model_choice: str)
 
 	research_topic = st.text_input(
 		"🎯 What would you like to research?",
-		value=st.session_state.research_topic,
+		key="research_topic",
 		placeholder="Click an example below or type your own research question...",
 		help="Be specific for better results. Include year, industry, or metric type.",
 	)
 
-	st.session_state.research_topic = research_topic
+	def set_research_topic(topic: str) -> None:
+		st.session_state.research_topic = topic
 
 	st.markdown("**Try these example research prompts:**")
 	col1, col2 = st.columns(2)
 
 	with col1:
-		if st.button("📱 Mobile App Retention by Industry", use_container_width=True):
-			st.session_state.research_topic = cfg.research_examples.mobile_retention
-			st.rerun()
-
-		if st.button("🛒 E-commerce Conversion Benchmarks", use_container_width=True):
-			st.session_state.research_topic = cfg.research_examples.ecommerce_conversion
-			st.rerun()
+		st.button(
+			"📱 Mobile App Retention by Industry",
+			use_container_width=True,
+			on_click=set_research_topic,
+			args=(cfg.research_examples.mobile_retention,),
+		)
+		st.button(
+			"🛒 E-commerce Conversion Benchmarks",
+			use_container_width=True,
+			on_click=set_research_topic,
+			args=(cfg.research_examples.ecommerce_conversion,),
+		)
 
 	with col2:
-		if st.button("💰 SaaS Pricing & Conversion Trends", use_container_width=True):
-			st.session_state.research_topic = cfg.research_examples.saas_pricing
-			st.rerun()
-
-		if st.button("📧 Email Marketing Benchmarks", use_container_width=True):
-			st.session_state.research_topic = cfg.research_examples.email_marketing
-			st.rerun()
+		st.button(
+			"💰 SaaS Pricing & Conversion Trends",
+			use_container_width=True,
+			on_click=set_research_topic,
+			args=(cfg.research_examples.saas_pricing,),
+		)
+		st.button(
+			"📧 Email Marketing Benchmarks",
+			use_container_width=True,
+			on_click=set_research_topic,
+			args=(cfg.research_examples.email_marketing,),
+		)
 
 	if st.button("🔍 Research Topic", type="primary"):
 		if not research_topic:
@@ -227,42 +362,179 @@ def render_market_research_tab(cfg: DictConfig, api_key: str, model_choice: str)
 			st.error("Please configure your Diffbot API token in the sidebar.")
 			return
 
-		research_query = cfg.prompts.market_research.format(
+		prompts = get_prompt_templates()
+		research_query = prompts["market_research"].format(
 			research_topic=research_topic
 		)
 
-		with st.spinner("🔍 Researching topic..."):
-			try:
-				result = analyze_with_diffbot(
-					research_query,
-					api_key,
-					model_choice,
-					cfg.api.base_url,
-					cfg.api.token_env_var
-				)
-				st.markdown("### 📊 Research Results")
-				st.markdown(result)
+		st.markdown("### 📊 Research Results")
+		try:
+			# Response streams into the page as tokens arrive
+			result = analyze_with_diffbot(
+				research_query,
+				api_key,
+				model_choice,
+				cfg.api.base_url,
+				cfg.api.token_env_var,
+				system=prompts["market_research_system"],
+			)
+
+		except Exception as e:
+			st.error(f"Research failed: {str(e)}")
+			return
+
+		if result:
+			store_analysis_result("Market Research", research_topic, result)
+			st.download_button(
+				"📄 Download CSV Report",
+				data=export_results_to_csv(
+					[
+						{
+							"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+							"type": "Market Research",
+							"query": research_topic,
+							"result": result,
+						}
+					]
+				),
+				file_name="market_research.csv",
+				mime="text/csv",
+			)
+
+
+@st.fragment
+def render_data_tab(cfg: "DictConfig", api_key: str, model_choice: str) -> None:
+	"""Render data explorer tab as a fragment scoped to its own reruns."""
+	st.header("📂 Data Explorer")
+	st.markdown("Upload a CSV or load a sample dataset, then analyze it with AI.")
+
+	uploaded_file = st.file_uploader("📤 Upload a CSV file", type="csv")
+	if uploaded_file is not None:
+		# Parse + summarize are cached on the raw bytes, so repeat reruns
+		# and repeat analyses of the same upload are free
+		df, summary = summarize_uploaded_csv(uploaded_file.getvalue())
+		st.session_state.explorer_df = df
+		st.session_state.explorer_summary = summary
 
-			except Exception as e:
-				st.error(f"Research failed: {str(e)}")
+	col1, col2 = st.columns(2)
+
+	with col1:
+		if st.button("🧪 Use Sample A/B Test Data", use_container_width=True):
+			sample_df = create_sample_data("ab_test")
+			st.session_state.explorer_df = sample_df
+			st.session_state.explorer_summary = build_dataframe_summary(sample_df)
+
+	with col2:
+		if st.button("📈 Use Sample Sales Data", use_container_width=True):
+			sample_df = create_sample_data("sales")
+			st.session_state.explorer_df = sample_df
+			st.session_state.explorer_summary = build_dataframe_summary(sample_df)
+
+	df = st.session_state.get("explorer_df")
+	if df is None:
+		return
+
+	st.dataframe(df.head(20), use_container_width=True)
+	st.caption(f"{len(df)} rows × {len(df.columns)} columns")
+
+	with st.expander("📋 Dataset summary"):
+		st.text(st.session_state.get("explorer_summary", ""))
+
+	question = st.text_input(
+		"🎯 What would you like to know about this data?",
+		placeholder="e.g. Which group converts better, and is the difference meaningful?",
+	)
+
+	if st.button("🔍 Analyze Data", type="primary"):
+		if not question:
+			st.warning("Please enter a question about the data.")
+			return
+
+		if not api_key:
+			st.error("Please configure your Diffbot API token in the sidebar.")
+			return
+
+		prompts = get_prompt_templates()
+		analysis_query = prompts["custom_analysis"].format(
+			question=question,
+			data_summary=st.session_state.get("explorer_summary", ""),
+		)
+
+		st.markdown("### 📊 Analysis Results")
+		try:
+			# Response streams into the page as tokens arrive
+			result = analyze_with_diffbot(
+				analysis_query,
+				api_key,
+				model_choice,
+				cfg.api.base_url,
+				cfg.api.token_env_var,
+				system=prompts["custom_analysis_system"],
+			)
+
+		except Exception as e:
+			st.error(f"Analysis failed: {str(e)}")
+			return
+
+		if result:
+			store_analysis_result("Custom Analysis", question, result)
+
+
+@st.fragment
+def render_history_tab() -> None:
+	"""Render analysis history tab as a fragment scoped to its own reruns."""
+	st.header("🕘 Analysis History")
+
+	# The other tabs run as fragments, so their reruns never reach this one
+	# and tab switching is purely client-side; without an explicit trigger a
+	# freshly stored result stays invisible here. Any click on this button
+	# reruns the fragment, which re-reads the history from session state.
+	st.button("🔄 Refresh")
+
+	history = st.session_state.get("analysis_history")
+	if not history:
+		st.info("No analyses yet. Results from the other tabs appear here.")
+		return
+
+	# Serialized fresh each rerun: at maxlen=100 rows this is sub-millisecond,
+	# and the history is per-session state, so a process-global cache keyed on
+	# anything short of the full contents risks serving another session's rows
+	# Export the real record columns only; summary and label are derived
+	# render strings that would just re-duplicate every row's text
+	export_columns = ("timestamp", "type", "query", "result")
+	st.download_button(
+		"📄 Export All Results",
+		data=export_results_to_csv(
+			[{key: row[key] for key in export_columns} for row in history]
+		),
+		file_name="analysis_history.csv",
+		mime="text/csv",
+	)
+
+	# Render newest-first and paginate so a full deque doesn't rebuild 100
+	# expanders' worth of markdown on every rerun
+	recent = list(reversed(history))
+	page_size = 20
+	if len(recent) > page_size and not st.checkbox(
+		f"Show all {len(recent)} analyses", value=False
+	):
+		recent = recent[:page_size]
+
+	for analysis in recent:
+		with st.expander(analysis["label"]):
+			# Expander bodies ship to the frontend whether opened or not, so
+			# render the precomputed preview rather than every full result;
+			# the export above carries the complete text
+			st.markdown(analysis["summary"])
 
 
 # Main Streamlit Application
 def main() -> None:
 	"""Main Streamlit application function."""
-	load_dotenv()  # Load environment variables from .env file
+	load_environment()  # .env is parsed once per process, not per rerun
 
-	# Initialize Hydra configuration
-	try:
-		if GlobalHydra().is_initialized():
-			GlobalHydra.instance().clear()
-		initialize(config_path=".", version_base=None)
-		cfg = compose(config_name="config")
-	except Exception:
-		# If initialization fails, try clearing and reinitializing
-		GlobalHydra.instance().clear()
-		initialize(config_path=".", version_base=None)
-		cfg = compose(config_name="config")
+	# Hydra compose runs once per process; reruns reuse the cached config
+	cfg = load_config()
 
 	setup_page_config(cfg)
 
@@ -273,10 +545,12 @@ def main() -> None:
 
 	api_key, model_choice = render_sidebar(cfg)
 
-	tab1, tab2 = st.tabs(
+	tab1, tab2, tab3, tab4 = st.tabs(
 		[
 			"📈 A/B Test Analyzer",
 			"🔍 Market Research",
+			"📂 Data Explorer",
+			"🕘 History",
 		]
 	)
 
@@ -286,6 +560,12 @@ def main() -> None:
 	with tab2:
 		render_market_research_tab(cfg, api_key, model_choice)
 
+	with tab3:
+		render_data_tab(cfg, api_key, model_choice)
+
+	with tab4:
+		render_history_tab()
+
 	st.divider()
 	st.markdown(
 		f"""
@@ -5,10 +5,85 @@ Handles all interactions with the Diffbot API including client initialization,
 authentication, and analysis requests.
 """
 
+import asyncio
+import atexit
 import os
-from typing import Optional
+from typing import List, Optional
 
-from openai import OpenAI
+import httpx
+import streamlit as st
+from openai import AsyncOpenAI, OpenAI
+
+# One connection-pool policy for both the sync and async transports
+_POOL_LIMITS = httpx.Limits(
+	max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0
+)
+_POOL_TIMEOUT = httpx.Timeout(60.0)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_http_client() -> httpx.Client:
+	"""
+	Return the process-wide pooled httpx client.
+
+	One client means one TLS context and one keep-alive connection pool
+	shared by every OpenAI client, whatever API key it was built for.
+	Closed at interpreter exit via atexit.
+	"""
+	client = httpx.Client(limits=_POOL_LIMITS, timeout=_POOL_TIMEOUT)
+	atexit.register(client.close)
+	return client
+
+
+@st.cache_resource(show_spinner=False)
+def get_diffbot_client(base_url: str, api_key: str) -> OpenAI:
+	"""
+	Return a shared OpenAI client for the given endpoint and key.
+
+	Caching the client keeps its pooled keep-alive HTTP connection across
+	reruns and sessions, avoiding a fresh TLS handshake per request.
+	"""
+	return OpenAI(base_url=base_url, api_key=api_key, http_client=_get_http_client())
+
+
+def _normalize_query(query: str) -> str:
+	"""Collapse whitespace runs so trivially-reworded prompts share a cache key."""
+	return " ".join(query.split())
+
+
+class _CompletionCacheMiss(Exception):
+	"""Raised when _cached_completion is probed for an entry that isn't cached."""
+
+
+@st.cache_data(ttl=86400, max_entries=500, persist="disk", show_spinner=False)
+def _cached_completion(
+	query_key: str,
+	model: str,
+	base_url: str,
+	system: Optional[str] = None,
+	_fetch=None,
+) -> str:
+	"""
+	Response-string cache for completions.
+
+	No Streamlit element runs inside this function, so nothing is recorded
+	for element replay and each entry — including the disk-persisted form —
+	stores exactly one string, not the per-chunk typewriter history that
+	st.write_stream would leave behind. The key is (query_key, model,
+	base_url, system), where query_key is the whitespace-normalized prompt;
+	the API key never enters the key or the cached value, keeping the disk
+	cache free of credentials, and the cache persists to disk so
+	previously-seen prompts survive server restarts.
+
+	Called with _fetch=None the function acts as a probe: a hit returns the
+	stored string without running the body, a miss raises
+	_CompletionCacheMiss (st.cache_data never caches exceptions). The
+	caller then streams the live response into the page and stores it by
+	calling again with a _fetch that returns the finished string.
+	"""
+	if _fetch is None:
+		raise _CompletionCacheMiss(query_key)
+	return _fetch()
 
 
 def analyze_with_diffbot(
@@ -16,9 +91,19 @@ def analyze_with_diffbot(
 	api_key: Optional[str] = None,
 	model: str = "diffbot-small-xl",
 	base_url: str = "https://llm.diffbot.com/rag/v1",
-	token_env_var: str = "DIFFBOT_API_TOKEN"
+	token_env_var: str = "DIFFBOT_API_TOKEN",
+	system: Optional[str] = None,
 ) -> str:
-	"""Send query to Diffbot and return response."""
+	"""
+	Send query to Diffbot, render the response into the page, and return it.
+
+	On a cache hit the stored string renders in one st.markdown call; on a
+	miss tokens stream incrementally via st.write_stream, so time-to-first-
+	token replaces time-to-last-token for perceived latency. The optional
+	system message carries the static instructions and goes first, so
+	provider-side prompt caches can hit on the shared prefix across
+	requests that only differ in their user message.
+	"""
 	# Use provided api_key or get from environment
 	effective_api_key = api_key or os.getenv(token_env_var)
 
@@ -26,13 +111,122 @@ def analyze_with_diffbot(
 	if not effective_api_key or not effective_api_key.strip():
 		return "❌ API key is required. Please provide your Diffbot API token in the sidebar."
 
-	client = OpenAI(base_url=base_url, api_key=effective_api_key)
-	response = client.chat.completions.create(
-		model=model, messages=[{"role": "user", "content": query}]
+	query_key = _normalize_query(query)
+	try:
+		cached = _cached_completion(query_key, model, base_url, system)
+	except _CompletionCacheMiss:
+		pass
+	else:
+		st.markdown(cached)
+		return cached
+
+	client = get_diffbot_client(base_url, effective_api_key)
+	messages = [{"role": "system", "content": system}] if system else []
+	messages.append({"role": "user", "content": query})
+	stream = client.chat.completions.create(
+		model=model,
+		messages=messages,
+		stream=True,
 	)
-	return response.choices[0].message.content or ""
+
+	def _token_chunks():
+		for chunk in stream:
+			if chunk.choices:
+				yield chunk.choices[0].delta.content or ""
+
+	streamed = st.write_stream(_token_chunks())
+	result = streamed if isinstance(streamed, str) else "".join(map(str, streamed))
+	return _cached_completion(query_key, model, base_url, system, _fetch=lambda: result)
+
+
+async def _request_completion_async(
+	client: AsyncOpenAI, query: str, model: str, inflight: dict
+) -> str:
+	"""
+	Issue a single chat completion, coalescing duplicate in-flight requests.
+
+	Concurrent callers with the same (query, model) — a double-submitted
+	batch, say — await one shared future instead of each paying a separate
+	API round-trip. The inflight map is scoped to one batch and therefore
+	one event loop: asyncio futures are bound to the loop that created
+	them, so a process-wide map would hand a caller on another loop a
+	foreign future and fail its whole gather. Duplicates across batches
+	just cost one extra API call.
+	"""
+	key = (query, model)
+	existing = inflight.get(key)
+	if existing is not None:
+		return await existing
+
+	future = asyncio.get_running_loop().create_future()
+	inflight[key] = future
+	try:
+		response = await client.chat.completions.create(
+			model=model, messages=[{"role": "user", "content": query}]
+		)
+		result = response.choices[0].message.content or ""
+	except Exception as exc:
+		future.set_exception(exc)
+		# Mark retrieved in case no duplicate caller is waiting
+		future.exception()
+		raise
+	else:
+		future.set_result(result)
+		return result
+	finally:
+		inflight.pop(key, None)
+
+
+def analyze_many_with_diffbot(
+	queries: List[str],
+	api_key: Optional[str] = None,
+	model: str = "diffbot-small-xl",
+	base_url: str = "https://llm.diffbot.com/rag/v1",
+	token_env_var: str = "DIFFBOT_API_TOKEN"
+) -> List[str]:
+	"""
+	Send several independent queries to Diffbot concurrently.
+
+	Fans the prompts out with asyncio.gather so N prompts cost roughly one
+	round-trip instead of N sequential ones. Returns responses in the same
+	order as the input queries.
+	"""
+	effective_api_key = api_key or os.getenv(token_env_var)
+
+	if not effective_api_key or not effective_api_key.strip():
+		return [
+			"❌ API key is required. Please provide your Diffbot API token in the sidebar."
+		] * len(queries)
+
+	async def _gather() -> List[str]:
+		# One pooled AsyncClient per batch, with the same limits and timeout
+		# as the sync pool. It cannot be process-cached like _get_http_client:
+		# asyncio.run builds a fresh event loop per call and AsyncClient
+		# connections are bound to the loop they were opened on, so a shared
+		# instance would break on the second batch. Within the batch every
+		# query still rides one TLS context and keep-alive pool.
+		http_client = httpx.AsyncClient(limits=_POOL_LIMITS, timeout=_POOL_TIMEOUT)
+		client = AsyncOpenAI(
+			base_url=base_url, api_key=effective_api_key, http_client=http_client
+		)
+		# Single-flight map for this batch: futures for requests currently on
+		# the wire, keyed on (query, model); entries drop as requests settle
+		inflight: dict = {}
+		try:
+			return await asyncio.gather(
+				*[
+					_request_completion_async(client, query, model, inflight)
+					for query in queries
+				]
+			)
+		finally:
+			await client.close()
+			await http_client.aclose()
+
+	return asyncio.run(_gather())
 
 
+@st.cache_data(ttl=300, max_entries=16, show_spinner=False)
 def validate_api_key(api_key: Optional[str] = None) -> bool:
 	"""Check if API key is provided and valid."""
 	return bool(api_key and api_key.strip())
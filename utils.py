@@ -5,21 +5,201 @@ Handles data calculations, export functionality, and chart creation
 for the Diffbot Analytics Dashboard.
 """
 
-import plotly.graph_objects as go
+import csv
+import io
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
+import numpy as np
+import streamlit as st
+from numpy.typing import ArrayLike
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@lru_cache(maxsize=1024)
 def calculate_conversion_rate(conversions: int, users: int) -> float:
     """Calculate conversion rate as percentage."""
     return (conversions / users) * 100 if users > 0 else 0.0
 
 
+@st.cache_data(max_entries=256, show_spinner=False)
+def ab_stats(
+    control_users: ArrayLike,
+    control_conversions: ArrayLike,
+    treatment_users: ArrayLike,
+    treatment_conversions: ArrayLike,
+) -> dict:
+    """
+    Compute two-proportion z-test statistics for one or many A/B tests.
+
+    Accepts scalars or equal-length arrays, so a whole sweep of scenarios
+    (power analysis, MDE curves) computes in a single vectorized pass.
+    Returns a dict with conversion rates (percent), the rate difference in
+    percentage points, z-score, two-sided p-value, and the 95% confidence
+    interval for the difference. Scalar inputs yield plain floats.
+
+    scipy is imported lazily — nothing else in the app needs it, so cold
+    start skips the import until the first statistics computation, which
+    the cache decorator limits to once per input tuple.
+    """
+    from scipy.stats import norm
+
+    cu, cc, tu, tc = (
+        np.asarray(x, dtype=float)
+        for x in (
+            control_users,
+            control_conversions,
+            treatment_users,
+            treatment_conversions,
+        )
+    )
+    cu_safe = np.where(cu > 0, cu, 1.0)
+    tu_safe = np.where(tu > 0, tu, 1.0)
+    p1 = np.where(cu > 0, cc / cu_safe, 0.0)
+    p2 = np.where(tu > 0, tc / tu_safe, 0.0)
+    se = np.sqrt(
+        np.where(
+            (cu > 0) & (tu > 0),
+            p1 * (1 - p1) / cu_safe + p2 * (1 - p2) / tu_safe,
+            0.0,
+        )
+    )
+    z = np.where(se > 0, (p2 - p1) / np.where(se > 0, se, 1.0), 0.0)
+    p_value = 2 * (1 - norm.cdf(np.abs(z)))
+    margin = norm.ppf(0.975) * se
+
+    scalar = np.ndim(z) == 0
+
+    def _unwrap(value: np.ndarray):
+        return float(value) if scalar else value
+
+    return {
+        "control_rate": _unwrap(p1 * 100),
+        "treatment_rate": _unwrap(p2 * 100),
+        "diff": _unwrap((p2 - p1) * 100),
+        "z_score": _unwrap(z),
+        "p_value": _unwrap(p_value),
+        "ci_low": _unwrap((p2 - p1 - margin) * 100),
+        "ci_high": _unwrap((p2 - p1 + margin) * 100),
+    }
+
+
+@st.cache_data(ttl=24 * 60 * 60, show_spinner=False)
+def create_sample_data(data_type: str = "ab_test") -> "pd.DataFrame":
+    """
+    Generate a deterministic sample dataset for the data explorer.
+
+    Columns are built with vectorized NumPy arithmetic rather than Python
+    list comprehensions, so the 2000-row A/B frame and the year of sales
+    data assemble in single C-level passes.
+    """
+    import pandas as pd
+
+    if data_type == "ab_test":
+        i = np.arange(2000)
+        # int8 codes instead of 2000 Python strings; also speeds groupbys
+        group = pd.Categorical.from_codes(
+            np.where(i < 1000, 0, 1), categories=["control", "treatment"]
+        )
+        converted = np.where(
+            ((i < 1000) & (i % 20 == 0)) | ((i >= 1000) & (i % 15 == 0)), 1, 0
+        )
+        return pd.DataFrame({"user_id": i + 1, "group": group, "converted": converted})
+
+    if data_type == "sales":
+        dates = pd.date_range("2024-01-01", periods=365, freq="D")
+        i = np.arange(len(dates))
+        return pd.DataFrame(
+            {
+                "date": dates,
+                "sales": 100 + (i % 30) * 10 + (i % 7) * 5,
+                "visitors": 1000 + (i % 50) * 20,
+            }
+        )
+
+    raise ValueError(f"Unknown sample data type: {data_type!r}")
+
+
+def build_dataframe_summary(df: "pd.DataFrame") -> str:
+    """Build the dataset summary text used in previews and LLM prompts."""
+    info_buffer = io.StringIO()
+    df.info(buf=info_buffer)
+    # memory_usage(deep=True) walks every object column, so it runs here —
+    # inside the cached summary — rather than on each rerun of the preview
+    memory_kb = df.memory_usage(deep=True).sum() / 1024
+    return "\n\n".join(
+        [
+            f"Shape: {df.shape[0]} rows × {df.shape[1]} columns",
+            f"Memory usage: {memory_kb:.1f} KB",
+            "Column info:\n" + info_buffer.getvalue(),
+            "Summary statistics:\n" + df.describe(include="all").to_string(),
+            "First rows:\n" + df.head().to_string(),
+        ]
+    )
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def summarize_uploaded_csv(file_bytes: bytes) -> "tuple[pd.DataFrame, str]":
+    """
+    Parse an uploaded CSV and build its summary, cached on the raw bytes.
+
+    df.info/df.describe/df.head all walk the full frame, so repeat analyses
+    of the same upload reuse the parsed DataFrame and summary string
+    instead of recomputing them on every rerun.
+    """
+    import pandas as pd
+
+    df = pd.read_csv(io.BytesIO(file_bytes))
+    return df, build_dataframe_summary(df)
+
+
+def export_results_to_csv(rows: list) -> bytes:
+    """
+    Serialize analysis result rows (list of dicts) to CSV bytes.
+
+    Writes straight through csv.writer into a StringIO; for a handful of
+    result rows pandas' DataFrame construction and per-cell to_csv dispatch
+    add cost without adding value. Returns raw bytes for
+    st.download_button, which serves them directly on click.
+    """
+    if not rows:
+        return b""
+
+    # Union of keys in first-seen order, so mixed record shapes export cleanly
+    fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+    buffer = io.BytesIO()
+    # Write UTF-8 straight into the bytes buffer instead of building the
+    # whole CSV as a str and encoding it in a second full pass
+    text = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+    writer = csv.DictWriter(
+        text, fieldnames=fieldnames, restval="", quoting=csv.QUOTE_MINIMAL
+    )
+    writer.writeheader()
+    writer.writerows(rows)
+    text.detach()
+    return buffer.getvalue()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
 def create_ab_test_visualization(
     control_users: int,
     control_conversions: int,
     treatment_users: int,
     treatment_conversions: int,
-) -> go.Figure:
-    """Create bar chart visualization for A/B test results."""
+) -> dict:
+    """Create bar chart visualization for A/B test results.
+
+    Returns the figure as a plain dict (plotly's JSON form): st.plotly_chart
+    renders it directly, cache hits skip Figure reconstruction and
+    serialization, and the cached value pickles as primitives. Plotly is
+    imported lazily so the Streamlit server's cold start does not pay the
+    import cost unless the A/B tab is actually used; with the cache
+    decorator above, construction runs at most once per input tuple.
+    """
+    import plotly.graph_objects as go
+
     control_rate = calculate_conversion_rate(control_conversions, control_users)
     treatment_rate = calculate_conversion_rate(treatment_conversions, treatment_users)
 
@@ -47,4 +227,4 @@ def create_ab_test_visualization(
         showlegend=True,
     )
 
-    return fig
+    return fig.to_dict()